@@ -2,20 +2,30 @@
 # Full backend + embedded HTML with live search, skill filter, graph view, and item descriptions
 
 import asyncio
-import json
+import bisect
+import hashlib
 import logging
+import sys
+from collections import defaultdict
 from logging.handlers import RotatingFileHandler
 from contextlib import asynccontextmanager
 from typing import Any, Dict, Optional
 
 import aiohttp
+import numpy as np
+import orjson
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, Path
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.templating import Jinja2Templates
 import uvicorn
 import time
 import re
 
+try:
+    import ahocorasick  # pyahocorasick
+except ImportError:
+    ahocorasick = None
+
 # ==========================
 # API URLs
 # ==========================
@@ -24,6 +34,7 @@ PRICES_URL = "https://prices.runescape.wiki/api/v1/osrs/latest"
 ONEH_URL = "https://prices.runescape.wiki/api/v1/osrs/1h"
 
 FETCH_INTERVAL_SECONDS = 40
+MAPPING_REFRESH_TICKS = 10  # mapping rarely changes; refetch every Nth tick
 DEFAULT_MAX_RESULTS = 30
 DEFAULT_MIN_VOLUME = 10
 
@@ -83,6 +94,40 @@ SKILL_TAGS = {
     ]
 }
 
+# Lowercased tags and one bit per skill, so the per-item skill filter is a
+# single integer AND against a mask precomputed at refresh time.
+SKILL_TAGS_LOWER = {skill: [t.lower() for t in tags] for skill, tags in SKILL_TAGS.items()}
+SKILL_BITS = {skill: 1 << i for i, skill in enumerate(SKILL_TAGS)}
+
+
+def _build_skill_automaton():
+    # One Aho-Corasick pass over a name replaces ~100 independent substring
+    # scans. Tags shared by several skills get OR'd bits.
+    auto = ahocorasick.Automaton()
+    bits = {}
+    for skill, tags in SKILL_TAGS_LOWER.items():
+        for tag in tags:
+            bits[tag] = bits.get(tag, 0) | SKILL_BITS[skill]
+    for tag, bit in bits.items():
+        auto.add_word(tag, bit)
+    auto.make_automaton()
+    return auto
+
+
+_skill_automaton = _build_skill_automaton() if ahocorasick else None
+
+
+def skill_mask(name_lower):
+    mask = 0
+    if _skill_automaton is not None:
+        for _, bit in _skill_automaton.iter(name_lower):
+            mask |= bit
+        return mask
+    for skill, bit in SKILL_BITS.items():
+        if any(tag in name_lower for tag in SKILL_TAGS_LOWER[skill]):
+            mask |= bit
+    return mask
+
 
 # ==========================
 # Logging Setup
@@ -98,13 +143,29 @@ log.addHandler(logging.StreamHandler())
 # ==========================
 # FastAPI App and Globals
 # ==========================
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 http_session: Optional[aiohttp.ClientSession] = None
 _mapping, _latest, _oneh = {}, {}, {}
-clients: Dict[WebSocket, Dict[str, Any]] = {}
+_name_by_id: Dict[str, str] = {}  # flat id -> name view, rebuilt with _mapping
+clients: Dict[WebSocket, "ClientState"] = {}
+clients_list: list = []  # flat snapshot of clients.values(), rebuilt on churn
 
 templates = Jinja2Templates(directory="templates")
-history: Dict[str, list] = {}  # item price history
+
+# Per-item price history, bounded and timestamp-ordered. Lists rather
+# than deques: samples append in time order, so the history endpoint can
+# bisect for its cutoff, which needs O(1) indexing. Trimming happens in
+# batches once a buffer overshoots the bound by the slack, keeping
+# appends amortized O(1). Sized so a buffer can cover the longest
+# /history timeframe (1y) at the refresh cadence.
+HISTORY_MAX_SAMPLES = (365 * 86400) // FETCH_INTERVAL_SECONDS
+HISTORY_TRIM_SLACK = 1024
+history: Dict[str, list] = {}
+
+# Struct-of-arrays snapshot of normalized items, rebuilt once per refresh
+# tick. Numeric columns are parallel NumPy arrays so build_payload can
+# apply filters as vectorized boolean masks; names stay as plain lists.
+_items = None
 
 
 # ==========================
@@ -114,8 +175,19 @@ async def fetch_json(url):
     async with http_session.get(url) as resp:
         return await resp.json()
 
+_mapping_etag: Optional[str] = None
+
 async def fetch_mapping():
-    data = await fetch_json(MAPPING_URL)
+    # Conditional GET: the ~1 MB mapping list is effectively static, so a
+    # 304 skips both the download and the JSON parse. Returns None when
+    # the upstream copy is unchanged.
+    global _mapping_etag
+    headers = {"If-None-Match": _mapping_etag} if _mapping_etag else {}
+    async with http_session.get(MAPPING_URL, headers=headers) as resp:
+        if resp.status == 304:
+            return None
+        _mapping_etag = resp.headers.get("ETag")
+        data = await resp.json()
     return {str(d["id"]): d for d in data if "id" in d}
 
 async def fetch_latest():
@@ -127,7 +199,7 @@ async def fetch_oneh():
 def ffloat(v):
     try:
         return float(v)
-    except:
+    except (TypeError, ValueError):
         return None
 
 def buy_price(info): return ffloat(info.get("low"))
@@ -135,18 +207,56 @@ def sell_price(info): return ffloat(info.get("high"))
 def profit_gp(b, s): return s - b if b and s else None
 def profit_pct(b, s): return ((s - b) / b * 100.0) if b and s and b != 0 else None
 
+# Filters holding numeric thresholds; typed once when a client sets them.
+NUMERIC_FILTERS = ("max_price", "min_profit_gp", "min_profit_pct", "min_volume")
+
+def normalize_filters(filters):
+    # Coerce incoming filter values to floats (or None for unset/invalid)
+    # so the payload path never parses strings. Falsy thresholds mean
+    # "no filter", matching the original truthiness checks.
+    out = dict(filters)
+    for k in NUMERIC_FILTERS:
+        out[k] = ffloat(out.get(k)) or None
+    out["max_results"] = int(ffloat(out.get("max_results")) or DEFAULT_MAX_RESULTS)
+    return out
+
+def filter_signature(filters):
+    # Canonical cache key for a filter set. "search" is excluded: the
+    # frontend filters rows by name client-side, so clients typing in the
+    # search box can still share one cached payload.
+    return tuple(sorted((k, v) for k, v in filters.items() if k != "search"))
+
+
+def diff_items(last, items, mode):
+    # Build a patch payload against the rows last sent to one client.
+    # Returns None when nothing changed, so the send can be skipped.
+    current = {r["id"]: r for r in items}
+    add = [r for rid, r in current.items() if rid not in last]
+    update = [r for rid, r in current.items() if rid in last and last[rid] != r]
+    remove = [rid for rid in last if rid not in current]
+    if not (add or update or remove):
+        return None
+    return {
+        "type": "patch",
+        "mode": mode,
+        "add": add,
+        "update": update,
+        "remove": remove,
+        "order": [r["id"] for r in items],
+    }
+
 
 # ==========================
-# Build Websocket Payload
+# Item Normalization (once per refresh)
 # ==========================
-async def build_payload(filters):
-    mapping, latest, oneh = _mapping.copy(), _latest.copy(), _oneh.copy()
-    results = []
+def build_items(name_by_id, latest, oneh):
+    ids, names, names_lower = [], [], []
+    buys, sells, gps, pcs, vols, masks = [], [], [], [], [], []
 
     for item_id, price_info in latest.items():
         b, s = buy_price(price_info), sell_price(price_info)
         gp, pc = profit_gp(b, s), profit_pct(b, s)
-        if None in (b, s, gp, pc): 
+        if None in (b, s, gp, pc):
             continue
 
         vol = (
@@ -154,51 +264,207 @@ async def build_payload(filters):
             (ffloat(oneh.get(item_id, {}).get("lowPriceVolume")) or 0)
         )
 
-        if filters.get("volume_mode") == "daily":
-            vol *= 24
+        # Interned names make the strings carried through every payload,
+        # diff and history tick share one object per item across rebuilds.
+        name = sys.intern(name_by_id.get(item_id, item_id))
+        name_lower = name.lower()
+
+        ids.append(int(item_id))
+        names.append(name)
+        names_lower.append(name_lower)
+        buys.append(b)
+        sells.append(s)
+        gps.append(gp)
+        pcs.append(pc)
+        vols.append(vol)
+        masks.append(skill_mask(name_lower))
 
-        try:
-            if filters.get("max_price") and b > float(filters["max_price"]): continue
-            if filters.get("min_profit_gp") and gp < float(filters["min_profit_gp"]): continue
-            if filters.get("min_profit_pct") and pc < float(filters["min_profit_pct"]): continue
-            if filters.get("min_volume") and vol < float(filters["min_volume"]): continue
-        except:
-            continue
+    return {
+        "n": len(ids),
+        "id": np.array(ids, dtype=np.int64),
+        "name": names,
+        "name_lower": names_lower,
+        "buy": np.array(buys, dtype=np.float64),
+        "sell": np.array(sells, dtype=np.float64),
+        "profit": np.array(gps, dtype=np.float64),
+        "profit_pct": np.array(pcs, dtype=np.float64),
+        "volume_h": np.array(vols, dtype=np.float64),
+        "skill_mask": np.array(masks, dtype=np.uint32),
+    }
 
-        name = mapping.get(item_id, {}).get("name", item_id)
 
-        # Skill tags
-        if filters.get("skill") and filters["skill"] in SKILL_TAGS:
-            tags = SKILL_TAGS.get(filters["skill"])
-            if not any(tag.lower() in name.lower() for tag in tags):
-                continue
+# ==========================
+# Specialized Row Filters
+# ==========================
+# For a given filter set the thresholds are constants, so we generate a
+# mask builder with them baked in — inactive filters compile to nothing
+# and active ones skip the per-call None checks and dict lookups. One
+# function per distinct filter signature, cached across ticks.
+_row_filter_cache: Dict[tuple, Any] = {}
+_ROW_FILTER_CACHE_MAX = 256
+
+
+def _compile_row_filter(max_price, min_gp, min_pct, min_vol, skill_bit, daily):
+    lines = [
+        "def row_filter(items):",
+        "    keep = np.ones(items['n'], dtype=bool)",
+    ]
+    if max_price is not None:
+        lines.append(f"    keep &= items['buy'] <= {float(max_price)!r}")
+    if min_gp is not None:
+        lines.append(f"    keep &= items['profit'] >= {float(min_gp)!r}")
+    if min_pct is not None:
+        lines.append(f"    keep &= items['profit_pct'] >= {float(min_pct)!r}")
+    if min_vol is not None:
+        # Daily volume is hourly * 24; fold the scale into the threshold.
+        threshold = float(min_vol) / 24 if daily else float(min_vol)
+        lines.append(f"    keep &= items['volume_h'] >= {threshold!r}")
+    if skill_bit:
+        lines.append(f"    keep &= (items['skill_mask'] & {skill_bit}) != 0")
+    lines.append("    return keep")
+
+    namespace = {"np": np}
+    exec("\n".join(lines), namespace)
+    return namespace["row_filter"]
+
+
+def _row_filter_for(filters):
+    sig = filter_signature(filters)
+    fn = _row_filter_cache.get(sig)
+    if fn is None:
+        if len(_row_filter_cache) >= _ROW_FILTER_CACHE_MAX:
+            _row_filter_cache.clear()
+        fn = _compile_row_filter(
+            filters.get("max_price"),
+            filters.get("min_profit_gp"),
+            filters.get("min_profit_pct"),
+            filters.get("min_volume"),
+            SKILL_BITS.get(filters.get("skill"), 0),
+            filters.get("volume_mode") == "daily",
+        )
+        _row_filter_cache[sig] = fn
+    return fn
 
-        if filters.get("search") and filters["search"].lower() not in name.lower():
-            continue
 
-        results.append({
-            "id": int(item_id),
-            "name": name,
-            "buy": b,
-            "sell": s,
-            "profit": gp,
-            "profit_pct": pc,
-            "volume": vol
-        })
+# Payload dict + serialized bytes per filter signature, valid for the
+# current item snapshot. The refresher clears it after each rebuild, so
+# mid-tick connects and filter changes reuse what the broadcast built.
+_payload_cache: Dict[tuple, tuple] = {}
+
+# The update envelope is constant per mode, so full frames are assembled
+# by slapping a pre-encoded prefix around the serialized items list
+# instead of walking the whole payload dict again.
+_UPDATE_PREFIX = {
+    mode: b'{"type":"update","mode":"' + mode.encode() + b'","items":'
+    for mode in ("hourly", "daily")
+}
+
+
+def _encode_update(payload):
+    prefix = _UPDATE_PREFIX.get(payload["mode"])
+    if prefix is None:
+        return orjson.dumps(payload)
+    return prefix + orjson.dumps(payload["items"]) + b"}"
+
+
+async def build_payload_cached(filters, sig=None):
+    if sig is None:
+        sig = filter_signature(filters)
+    entry = _payload_cache.get(sig)
+    if entry is None:
+        payload = await build_payload(filters)
+        entry = (payload, _encode_update(payload))
+        _payload_cache[sig] = entry
+    return entry
+
+
+# ==========================
+# Build Websocket Payload
+# ==========================
+async def build_payload(filters):
+    daily = filters.get("volume_mode") == "daily"
+    mode = filters.get("volume_mode", "hourly")
+    items = _items
+    if not items or not items["n"]:
+        return {"type": "update", "mode": mode, "items": []}
+
+    vol = items["volume_h"] * 24 if daily else items["volume_h"]
+
+    keep = _row_filter_for(filters)(items)
+    idx = np.nonzero(keep)[0]
 
     key = {"cost": "buy", "profit_pct": "profit_pct"}.get(filters.get("sort"), "profit")
-    results.sort(key=lambda x: x.get(key), reverse=(key != "buy"))
+    k = max(filters.get("max_results", DEFAULT_MAX_RESULTS), 0)
+
+    # Partial selection: pick the top K with argpartition (O(n)), then
+    # sort only those K instead of ordering every surviving row.
+    vals = items[key][idx] if key == "buy" else -items[key][idx]
+    if k and len(idx) > k:
+        sel = np.argpartition(vals, k - 1)[:k]
+        sel = sel[np.argsort(vals[sel], kind="stable")]
+    else:
+        sel = np.argsort(vals, kind="stable")[:k]
+    top = idx[sel]
 
     return {
         "type": "update",
-        "mode": filters.get("volume_mode", "hourly"),
-        "items": results[:int(filters.get("max_results", DEFAULT_MAX_RESULTS))]
+        "mode": mode,
+        "items": [
+            {
+                "id": int(items["id"][i]),
+                "name": items["name"][i],
+                "buy": float(items["buy"][i]),
+                "sell": float(items["sell"][i]),
+                "profit": float(items["profit"][i]),
+                "profit_pct": float(items["profit_pct"][i]),
+                "volume": float(vol[i]),
+            }
+            for i in top
+        ]
     }
 
 
 # ==========================
 # WebSocket Endpoint
 # ==========================
+_PONG = orjson.dumps({"type": "pong"})
+
+
+def _enqueue(state, data):
+    try:
+        state.outq.put_nowait(data)
+        return True
+    except asyncio.QueueFull:
+        return False
+
+
+async def send_full_payload(state):
+    # Full resync: queue the complete item list and record it as the
+    # baseline for subsequent patch broadcasts. If the queue is full the
+    # frame never reaches the client, so leave the baseline unset — the
+    # next broadcast retries the resync instead of patching against rows
+    # the client never saw.
+    payload, full_bytes = await build_payload_cached(state.filters, state.sig)
+    if _enqueue(state, full_bytes):
+        state.last = {r["id"]: r for r in payload["items"]}
+    else:
+        state.last = None
+
+
+# Bursts of set_filters (e.g. a client wired to fire per keystroke) are
+# coalesced: only the last message within the window gets applied.
+FILTER_DEBOUNCE_SECONDS = 0.05
+
+
+async def _apply_pending_filters(state, filter_keys):
+    await asyncio.sleep(FILTER_DEBOUNCE_SECONDS)
+    msg, state.pending = state.pending, None
+    state.set_filters(normalize_filters(
+        {**state.filters, **{k: msg.get(k) for k in filter_keys}}
+    ))
+    await send_full_payload(state)
+
+
 @app.websocket("/ws")
 async def ws_endpoint(ws: WebSocket):
     await ws.accept()
@@ -210,35 +476,169 @@ async def ws_endpoint(ws: WebSocket):
         "search": "", "volume_mode": "hourly"
     }
 
-    clients[ws] = default_filters
-    await ws.send_text(json.dumps(await build_payload(default_filters)))
+    state = ClientState(ws, default_filters)
+    clients[ws] = state
+    _rebuild_clients_list()
+    # All outbound frames funnel through the queue so the writer task is
+    # the only sender and ordering is preserved.
+    writer = asyncio.create_task(_client_writer(ws, state.outq))
+    await send_full_payload(state)
 
     try:
         while True:
-            msg = json.loads(await ws.receive_text())
+            msg = orjson.loads(await ws.receive_text())
 
             if msg.get("type") == "set_filters":
-                filters = {**clients.get(ws, {}), **{k: msg.get(k) for k in default_filters}}
-                clients[ws] = filters
-                await ws.send_text(json.dumps(await build_payload(filters)))
+                state.pending = msg
+                if state.debounce is None or state.debounce.done():
+                    state.debounce = asyncio.create_task(
+                        _apply_pending_filters(state, tuple(default_filters))
+                    )
 
             elif msg.get("type") == "ping":
-                await ws.send_text(json.dumps({"type": "pong"}))
+                _enqueue(state, _PONG)
 
     except WebSocketDisconnect:
+        pass
+    finally:
+        writer.cancel()
+        if state.debounce is not None:
+            state.debounce.cancel()
         clients.pop(ws, None)
+        _rebuild_clients_list()
+
+
+# ==========================
+# Broadcast
+# ==========================
+# Each connection gets a small bounded outbound queue drained by its own
+# writer task. The broadcast only does put_nowait, so one slow consumer
+# can neither stall the tick nor buffer unbounded memory — when its
+# queue overflows, the client is dropped instead.
+OUTQ_MAXSIZE = 4
+
+slow_consumers = 0  # connections dropped for not keeping up
+
+
+class ClientState:
+    # __slots__ keeps hot-path access at fixed attribute offsets instead
+    # of per-lookup dict hashing, and fixes the shape of the record.
+    __slots__ = ("ws", "filters", "outq", "last", "sig", "pending", "debounce")
+
+    def __init__(self, ws, filters):
+        self.ws = ws
+        self.filters = filters
+        self.outq = asyncio.Queue(maxsize=OUTQ_MAXSIZE)
+        self.last = None  # rows last sent, baseline for patch diffs
+        self.sig = filter_signature(filters)
+        self.pending = None  # latest unapplied set_filters message
+        self.debounce = None  # task applying pending filters after a delay
+
+    def set_filters(self, filters):
+        self.filters = filters
+        self.sig = filter_signature(filters)
+        self.last = None  # filters changed: force a resync
+
+
+def _rebuild_clients_list():
+    global clients_list
+    clients_list = list(clients.values())
+
+
+async def _client_writer(ws, outq):
+    # Exit quietly when the socket dies mid-send: the endpoint's cleanup
+    # drops the client, and an unretrieved task exception would otherwise
+    # spam "Task exception was never retrieved" on every abrupt disconnect.
+    try:
+        while True:
+            await ws.send_bytes(await outq.get())
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        pass
+
+
+async def broadcast_all():
+    global slow_consumers
+
+    # clients_list is only ever rebound on connect/disconnect, so holding
+    # a reference is a stable snapshot for the whole broadcast.
+    snap = clients_list
+
+    # Full payload + serialized bytes come from the shared per-signature
+    # cache; patches are diffed per client against what that client last saw.
+    slow = []
+    for state in snap:
+        payload, full_bytes = await build_payload_cached(state.filters, state.sig)
+
+        if state.last is None:
+            data = full_bytes
+        else:
+            patch = diff_items(state.last, payload["items"], payload["mode"])
+            if patch is None:
+                continue
+            data = orjson.dumps(patch)
+        state.last = {r["id"]: r for r in payload["items"]}
+
+        try:
+            state.outq.put_nowait(data)
+        except asyncio.QueueFull:
+            slow.append(state)
+
+    for state in slow:
+        slow_consumers += 1
+        log.warning("Dropping slow consumer (%d total)", slow_consumers)
+        clients.pop(state.ws, None)
+        try:
+            await state.ws.close()
+        except Exception:
+            pass
+    if slow:
+        _rebuild_clients_list()
 
 
 # ==========================
 # SINGLE Correct Refresher Loop
 # ==========================
 async def refresher_loop():
+    global _mapping, _name_by_id, _latest, _oneh, _items
+    tick = 0
+    last_digest = None
     while True:
         try:
-            _mapping.update(await fetch_mapping())
-            latest_new = await fetch_latest()
-            _latest.update(latest_new)
-            _oneh.update(await fetch_oneh())
+            # Rebind whole dicts instead of mutating in place: a rebind is
+            # atomic under the GIL, so readers always see a consistent
+            # snapshot without copying.
+            # The fetches are independent, so overlap them instead of
+            # paying three round trips back to back.
+            mapping_changed = False
+            if not _mapping or tick % MAPPING_REFRESH_TICKS == 0:
+                new_mapping, latest_new, oneh_new = await asyncio.gather(
+                    fetch_mapping(), fetch_latest(), fetch_oneh()
+                )
+                if new_mapping is not None:
+                    _mapping = new_mapping
+                    _name_by_id = {k: v.get("name", k) for k, v in new_mapping.items()}
+                    mapping_changed = True
+            else:
+                latest_new, oneh_new = await asyncio.gather(fetch_latest(), fetch_oneh())
+            _latest = latest_new
+            _oneh = oneh_new
+
+            # Quiet periods: if nothing upstream changed, every client
+            # would receive an identical (or empty) payload — skip the
+            # rebuild, history append and broadcast outright.
+            digest = hashlib.blake2b(
+                orjson.dumps(latest_new) + orjson.dumps(oneh_new), digest_size=16
+            ).digest()
+            if not mapping_changed and digest == last_digest:
+                tick += 1
+                await asyncio.sleep(FETCH_INTERVAL_SECONDS)
+                continue
+            last_digest = digest
+
+            _items = build_items(_name_by_id, _latest, _oneh)
+            _payload_cache.clear()  # payloads are stale for the new snapshot
 
             now = time.time()
             for item_id, info in latest_new.items():
@@ -247,27 +647,53 @@ async def refresher_loop():
                 if b is None or s is None:
                     continue
 
-                history.setdefault(item_id, []).append({
-                    "ts": now,
-                    "buy": b,
-                    "sell": s
-                })
+                samples = history.setdefault(item_id, [])
+                samples.append({"ts": now, "buy": b, "sell": s})
+                if len(samples) >= HISTORY_MAX_SAMPLES + HISTORY_TRIM_SLACK:
+                    del samples[:len(samples) - HISTORY_MAX_SAMPLES]
 
-            # Push updated data to connected clients
-            for ws in list(clients):
-                await ws.send_text(json.dumps(await build_payload(clients[ws])))
+            # Push updated data to connected clients. Clients sharing a
+            # filter set share one payload build + serialize per tick.
+            await broadcast_all()
 
         except Exception as e:
             log.exception("Refresher error: %s", e)
 
+        tick += 1
         await asyncio.sleep(FETCH_INTERVAL_SECONDS)
 
 
 # ==========================
 # Description Fetcher
 # ==========================
+_EXAMINE_RE = re.compile(r"Examine:\s*</span>(.*?)<")
+
+# Descriptions change rarely; cache them for a day and hold a per-item
+# lock while fetching so concurrent requests for a popular item result
+# in one upstream call instead of a thundering herd.
+DESCRIPTION_TTL_SECONDS = 24 * 3600
+_desc_cache: Dict[int, tuple] = {}  # item_id -> (fetched_ts, description)
+_desc_locks: Dict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+
 async def fetch_item_description(item_id: int) -> str:
-    name = _mapping.get(str(item_id), {}).get("name")
+    cached = _desc_cache.get(item_id)
+    if cached and time.time() - cached[0] < DESCRIPTION_TTL_SECONDS:
+        return cached[1]
+
+    async with _desc_locks[item_id]:
+        # Another request may have filled the cache while we waited.
+        cached = _desc_cache.get(item_id)
+        if cached and time.time() - cached[0] < DESCRIPTION_TTL_SECONDS:
+            return cached[1]
+
+        description = await _fetch_item_description(item_id)
+        _desc_cache[item_id] = (time.time(), description)
+        return description
+
+
+async def _fetch_item_description(item_id: int) -> str:
+    name = _name_by_id.get(str(item_id))
     if not name:
         return "Description not available."
 
@@ -286,7 +712,7 @@ async def fetch_item_description(item_id: int) -> str:
             data = await resp.json()
 
         html = data.get("parse", {}).get("text", {}).get("*", "")
-        match = re.search(r"Examine:\s*</span>(.*?)<", html)
+        match = _EXAMINE_RE.search(html)
         if match:
             return match.group(1).strip()
 
@@ -301,7 +727,7 @@ async def fetch_item_description(item_id: int) -> str:
 # ==========================
 @app.get("/item/{item_id}", response_class=HTMLResponse)
 async def item_page(request: Request, item_id: int = Path(...)):
-    name = _mapping.get(str(item_id), {}).get("name", f"Item {item_id}")
+    name = _name_by_id.get(str(item_id), f"Item {item_id}")
     description = await fetch_item_description(item_id)
     return templates.TemplateResponse("item.html", {
         "request": request,
@@ -327,7 +753,10 @@ async def item_history(item_id: int, timeframe: str = "7d"):
     }.get(timeframe, 0)
 
     raw = history.get(str(item_id), [])
-    filtered = [d for d in raw if d["ts"] >= cutoff]
+    # Samples are appended in time order, so the cutoff is a bisect away
+    # instead of a full scan.
+    start = bisect.bisect_left(raw, cutoff, key=lambda d: d["ts"]) if cutoff else 0
+    filtered = raw[start:]
 
     return {"item_id": item_id, "timeframe": timeframe, "data": filtered}
 
@@ -338,7 +767,10 @@ async def item_history(item_id: int, timeframe: str = "7d"):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global http_session
-    http_session = aiohttp.ClientSession()
+    http_session = aiohttp.ClientSession(
+        headers={"Accept-Encoding": "gzip, br"},
+        timeout=aiohttp.ClientTimeout(total=15),
+    )
     task = asyncio.create_task(refresher_loop())
 
     yield
@@ -376,21 +808,62 @@ th { background:#1e1208; color:#f0c060 }
 <div class=flex-col><label>Live search</label><input id=search placeholder="Type item name..."></div>
 </div><button onclick=sendFilters()>Apply</button><div id=status style="margin-top:10px">Connecting...</div>
 <table><thead><tr><th>ID</th><th>Name</th><th>Buy</th><th>Sell</th><th>Profit</th><th>%</th><th>Volume</th></tr></thead>
-<tbody id=items_body><tr><td colspan=7>Loading...</td></tr></tbody></table></div>
+<tbody id=items_body></tbody></table>
+<div id=empty_msg style="margin-top:10px">Loading...</div></div>
 <script>
 const ws = new WebSocket((location.protocol==="https:"?"wss://":"ws://")+location.host+"/ws");
+ws.binaryType = "arraybuffer";
 ws.onopen = () => { document.getElementById("status").textContent = "Connected"; sendFilters(); };
+
+// Rows are kept in a Map keyed by item id so patch frames only touch the
+// <tr> nodes that actually changed instead of rewriting the whole tbody.
+const rowMap = new Map();
+
+function rowCells(it){
+  return `<td>${it.id}</td><td><a href="/item/${it.id}" style="color:#f0d070;text-decoration:none">${it.name}</a></td><td>${it.buy}</td><td>${it.sell}</td><td>${it.profit}</td><td>${it.profit_pct.toFixed(1)}%</td><td>${Math.round(it.volume)}</td>`;
+}
+
+function applySearch(){
+  const q = (document.getElementById("search").value || "").toLowerCase();
+  let visible = 0;
+  for (const e of rowMap.values()){
+    const show = e.name.toLowerCase().includes(q);
+    e.tr.style.display = show ? "" : "none";
+    if (show) visible++;
+  }
+  const empty = document.getElementById("empty_msg");
+  empty.textContent = "No results";
+  empty.style.display = visible ? "none" : "";
+}
+
+function upsertRow(it){
+  let e = rowMap.get(it.id);
+  if (!e){ e = { name: it.name, tr: document.createElement("tr") }; rowMap.set(it.id, e); }
+  e.name = it.name;
+  e.tr.innerHTML = rowCells(it);
+  return e;
+}
+
+function reorderRows(ids){
+  const frag = document.createDocumentFragment();
+  for (const id of ids){ const e = rowMap.get(id); if (e) frag.appendChild(e.tr); }
+  document.getElementById("items_body").appendChild(frag);
+}
+
 ws.onmessage = evt => {
-  const data = JSON.parse(evt.data);
+  const data = JSON.parse(evt.data instanceof ArrayBuffer ? new TextDecoder().decode(evt.data) : evt.data);
   if (data.type === "update") {
-    const rows = data.items.filter(it => it.name.toLowerCase().includes(
-  (document.getElementById("search").value || "").toLowerCase()
-)).map(it =>
-  `<tr><td>${it.id}</td><td><a href="/item/${it.id}" style="color:#f0d070;text-decoration:none">${it.name}</a></td><td>${it.buy}</td><td>${it.sell}</td><td>${it.profit}</td><td>${it.profit_pct.toFixed(1)}%</td><td>${Math.round(it.volume)}</td></tr>`
-).join("\n");
-
-    document.getElementById("items_body").innerHTML =
-      rows || "<tr><td colspan=7>No results</td></tr>";
+    rowMap.clear();
+    document.getElementById("items_body").innerHTML = "";
+    for (const it of data.items) upsertRow(it);
+    reorderRows(data.items.map(it => it.id));
+    applySearch();
+  } else if (data.type === "patch") {
+    for (const it of data.add) upsertRow(it);
+    for (const it of data.update) upsertRow(it);
+    for (const id of data.remove){ const e = rowMap.get(id); if (e){ e.tr.remove(); rowMap.delete(id); } }
+    reorderRows(data.order);
+    applySearch();
   }
 };
 
@@ -409,7 +882,7 @@ function sendFilters(){
     search:get("search")
   }));
 }
-document.getElementById("search").addEventListener("input", () => sendFilters());
+document.getElementById("search").addEventListener("input", () => applySearch());
 setInterval(() => {
   if (ws.readyState === WebSocket.OPEN)
     ws.send(JSON.stringify({type:"ping"}))
@@ -427,4 +900,8 @@ async def serve_home(request: Request):
 # Server Startup
 # ==========================
 if __name__ == "__main__":
-    uvicorn.run("ge_tracker_full:app", host="0.0.0.0", port=8000, reload=False)
+    # uvloop + httptools (bundled with uvicorn[standard]) cut per-send and
+    # scheduling overhead on the WebSocket fan-out path; pin them rather
+    # than relying on "auto" detection.
+    uvicorn.run("ge_tracker_full:app", host="0.0.0.0", port=8000, reload=False,
+                loop="uvloop", http="httptools", ws="websockets")